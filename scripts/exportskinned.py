@@ -1,9 +1,28 @@
+import base64
 import bpy
+import numpy as np
 import os
 import xml.etree.ElementTree as ET
 import mathutils
 from mathutils import Vector
 
+# RNA properties never written as <Prop>, plus the two rotation
+# properties that don't match the object's rotation mode.
+SKIP_PROPS = frozenset({
+    'matrix_basis', 'matrix_local', 'matrix_custom', 'matrix',
+    'matrix_world', 'use_nodes',
+    'is_readonly', 'data'
+})
+SKIP_PROPS_BY_ROT_MODE = {
+    'QUATERNION': SKIP_PROPS | {'rotation_euler', 'rotation_axis_angle'},
+    'AXIS_ANGLE': SKIP_PROPS | {'rotation_euler', 'rotation_quaternion'},
+}
+SKIP_PROPS_EULER = SKIP_PROPS | {'rotation_quaternion', 'rotation_axis_angle'}
+
+
+def pack_base64(arr, dtype):
+    """Encode arr as base64 of its little-endian dtype bytes."""
+    return base64.b64encode(np.ascontiguousarray(arr, dtype=dtype).tobytes()).decode("ascii")
 
 # ------------------------------------------------------------
 # BlenderXMLExporter
@@ -35,8 +54,11 @@ def export_baked_pose_samples(arm_obj, frame_start, frame_end, xml_parent, actio
             })
 
 class BlenderXMLExporter:
-    def __init__(self, output_xml_path: str):
+    def __init__(self, output_xml_path: str, binary_geometry: bool = False):
         self.output_xml_path = os.path.abspath(output_xml_path)
+        # Write vertex coords and polygons as base64 blobs rather than one
+        # <V>/<P> per element; the importers read both forms.
+        self.binary_geometry = binary_geometry
         self.output_dir = os.path.dirname(self.output_xml_path)
         self.texture_dir = os.path.join(self.output_dir, "textures")
 
@@ -132,18 +154,7 @@ class BlenderXMLExporter:
                 "structure_type": "QUATERNION"
             })
 
-        skip_props = {
-            'matrix_basis', 'matrix_local', 'matrix_custom', 'matrix',
-            'matrix_world', 'use_nodes',
-            'is_readonly', 'data'
-        }
-
-        if rot_mode == 'QUATERNION':
-            skip_props.update({'rotation_euler', 'rotation_axis_angle'})
-        elif rot_mode == 'AXIS_ANGLE':
-            skip_props.update({'rotation_euler', 'rotation_quaternion'})
-        else:
-            skip_props.update({'rotation_quaternion', 'rotation_axis_angle'})
+        skip_props = SKIP_PROPS_BY_ROT_MODE.get(rot_mode, SKIP_PROPS_EULER)
 
         for prop in blender_object.bl_rna.properties:
             if prop.is_readonly or prop.identifier in skip_props:
@@ -160,20 +171,54 @@ class BlenderXMLExporter:
 
     # ----------------- Geometry -----------------
 
+    def _write_binary_geometry(self, mesh_data, mesh_node):
+        verts = mesh_data.vertices
+        co = np.empty(len(verts) * 3, dtype=np.float32)
+        verts.foreach_get("co", co)
+        ET.SubElement(mesh_node, "Vertices", {
+            "count": str(len(verts)),
+            "encoding": "base64",
+            "co": pack_base64(co, '<f4')
+        })
+
+        # A polygon's loops are contiguous, so the loops' vertex indices in
+        # order are every polygon's "i" list concatenated.
+        polys = mesh_data.polygons
+        loops = mesh_data.loops
+        vertex_indices = np.empty(len(loops), dtype=np.int32)
+        loops.foreach_get("vertex_index", vertex_indices)
+        sizes = np.empty(len(polys), dtype=np.int32)
+        polys.foreach_get("loop_total", sizes)
+        mat_indices = np.empty(len(polys), dtype=np.int32)
+        polys.foreach_get("material_index", mat_indices)
+        smooth = np.empty(len(polys), dtype=np.bool_)
+        polys.foreach_get("use_smooth", smooth)
+        ET.SubElement(mesh_node, "Polygons", {
+            "count": str(len(polys)),
+            "encoding": "base64",
+            "i": pack_base64(vertex_indices, '<i4'),
+            "sizes": pack_base64(sizes, '<i4'),
+            "m": pack_base64(mat_indices, '<i4'),
+            "smooth": pack_base64(smooth, np.bool_)
+        })
+
     def _traverse_mesh_geometry(self, mesh_data, parent_node):
         mesh_node = ET.SubElement(parent_node, "Geometry")
 
-        verts_node = ET.SubElement(mesh_node, "Vertices", {"count": str(len(mesh_data.vertices))})
-        for v in mesh_data.vertices:
-            ET.SubElement(verts_node, "V", {"co": f"{v.co.x},{v.co.y},{v.co.z}"})
-
-        polys_node = ET.SubElement(mesh_node, "Polygons", {"count": str(len(mesh_data.polygons))})
-        for p in mesh_data.polygons:
-            ET.SubElement(polys_node, "P", {
-                "i": ",".join(map(str, p.vertices)),
-                "m": str(p.material_index),
-                "smooth": str(p.use_smooth)
-            })
+        if self.binary_geometry:
+            self._write_binary_geometry(mesh_data, mesh_node)
+        else:
+            verts_node = ET.SubElement(mesh_node, "Vertices", {"count": str(len(mesh_data.vertices))})
+            for v in mesh_data.vertices:
+                ET.SubElement(verts_node, "V", {"co": f"{v.co.x},{v.co.y},{v.co.z}"})
+
+            polys_node = ET.SubElement(mesh_node, "Polygons", {"count": str(len(mesh_data.polygons))})
+            for p in mesh_data.polygons:
+                ET.SubElement(polys_node, "P", {
+                    "i": ",".join(map(str, p.vertices)),
+                    "m": str(p.material_index),
+                    "smooth": str(p.use_smooth)
+                })
         # -------------------------
         # Export mesh shading settings (version‑safe)
         # -------------------------
@@ -1,79 +1,268 @@
+import base64
 import bpy
+from bpy_extras import anim_utils
+import ctypes
+import functools
 import os
-import xml.etree.ElementTree as ET
+import sys
+import numpy as np
+try:
+    from lxml import etree as ET
+    HAVE_LXML = True
+except ImportError:
+    # lxml is not bundled with Blender; the stdlib parser streams the same way.
+    import xml.etree.ElementTree as ET
+    HAVE_LXML = False
 from mathutils import Vector, Euler, Quaternion, Matrix
-from bpy_extras import image_utils
 
 HIERARCHY_MAP = {}
 DEFERRED_POSES = []
 DEFERRED_ACTIONS = []
 DEFERRED_LINKS = []
+DEFERRED_ARMATURES = []
+MATERIAL_TEMPLATE = None
+SETTABLE_PROPS = {}
+# (XML object name, data block) -> Object created by import_object
+OBJECT_INDEX = {}
+# Name -> mesh/light/camera/armature data block; built by build_data_index
+DATA_INDEX = {}
+# Lower-cased file name -> path under the .blxml's directory; built on first use
+TEXTURE_INDEX = None
 
 def clean_scene():
     print("Cleaning Scene...")
     if bpy.context.view_layer.objects.active and bpy.context.view_layer.objects.active.mode != 'OBJECT':
         bpy.ops.object.mode_set(mode='OBJECT')
-    bpy.ops.object.select_all(action='SELECT')
-    bpy.ops.object.delete()
-
-    for col in [bpy.data.meshes, bpy.data.materials, bpy.data.armatures,
-                bpy.data.actions, bpy.data.cameras, bpy.data.lights, bpy.data.images]:
-        for block in col:
-            col.remove(block)
-
-    for block in bpy.data.collections:
-        if block.name != "Collection":
-            bpy.data.collections.remove(block)
-    if "Collection" in bpy.data.collections:
-        default_col = bpy.data.collections["Collection"]
-        for obj in list(default_col.objects):
-            default_col.objects.unlink(obj)
-    while len(bpy.data.scenes) > 1:
-        bpy.data.scenes.remove(bpy.data.scenes[-1])
-
-    global HIERARCHY_MAP, DEFERRED_POSES, DEFERRED_ACTIONS, DEFERRED_LINKS
+
+    # Everything goes in one batch_remove call rather than the select/delete
+    # operators plus a remove() per datablock.  Removing every object also
+    # empties the default "Collection", which is kept.  bpy.data.materials
+    # includes any hidden .BSDFTemplate an interrupted run left in the file.
+    ids = [*bpy.data.objects, *bpy.data.meshes, *bpy.data.materials, *bpy.data.armatures,
+           *bpy.data.actions, *bpy.data.cameras, *bpy.data.lights, *bpy.data.images]
+    ids.extend(block for block in bpy.data.collections if block.name != "Collection")
+    ids.extend(bpy.data.scenes[1:])
+    bpy.data.batch_remove(ids=ids)
+
+    global HIERARCHY_MAP, DEFERRED_POSES, DEFERRED_ACTIONS, DEFERRED_LINKS, DEFERRED_ARMATURES
+    global MATERIAL_TEMPLATE, OBJECT_INDEX, DATA_INDEX, TEXTURE_INDEX
     HIERARCHY_MAP = {}
     DEFERRED_POSES = []
     DEFERRED_ACTIONS = []
     DEFERRED_LINKS = []
+    DEFERRED_ARMATURES = []
+    MATERIAL_TEMPLATE = None
+    OBJECT_INDEX = {}
+    DATA_INDEX = {}
+    TEXTURE_INDEX = None
+
+def parse_float_list(value_str):
+    """Parse a short "x,y,z" style string into a list of floats.
+
+    Meant for vectors, colors and matrices: for a handful of values plain
+    split/float beats numpy's per-call setup.  Long runs of numbers go
+    through parse_csv_array instead.
+    """
+    return list(map(float, value_str.split(',')))
+
+def parse_matrix_4x4(value_str):
+    parts = parse_float_list(value_str)
+    return Matrix([parts[i:i+4] for i in range(0, 16, 4)])
+
+def parse_float_array(value_str):
+    # Property-sized, so split/float as in parse_float_list; a malformed
+    # number raises instead of numpy possibly returning a shorter list.
+    return parse_float_list(value_str) if value_str else []
+
+def parse_int_array(value_str):
+    return list(map(int, value_str.split(','))) if value_str else []
+
+# Parsers keyed on a Prop's structure_type, then on its RNA type, so each
+# <Prop> costs one dict lookup instead of a walk down an if/elif chain.
+STRUCT_PARSERS = {
+    "VECTOR": lambda s: Vector(parse_float_list(s)),
+    "EULER": lambda s: Euler(parse_float_list(s), 'XYZ'),
+    "QUATERNION": lambda s: Quaternion(parse_float_list(s)),
+    "MATRIX_4X4": parse_matrix_4x4,
+}
+TYPE_PARSERS = {
+    'STRING': str,
+    'ENUM': str,
+    'POINTER': str,
+    'BOOLEAN': "True".__eq__,
+    'INT': int,
+    'FLOAT': float,
+    'FLOAT_ARRAY': parse_float_array,
+    'INT_ARRAY': parse_int_array,
+    'BOOLEAN_ARRAY': parse_int_array,
+}
 
 def parse_typed_value(value_str, type_str, struct_type):
     if value_str is None or value_str == "None":
         return None
     try:
-        if struct_type == "VECTOR":
-            return Vector([float(x) for x in value_str.split(',')])
-        elif struct_type == "EULER":
-            return Euler([float(x) for x in value_str.split(',')], 'XYZ')
-        elif struct_type == "QUATERNION":
-            return Quaternion([float(x) for x in value_str.split(',')])
-        elif struct_type == "MATRIX_4X4":
-            parts = [float(x) for x in value_str.split(',')]
-            return Matrix([parts[i:i+4] for i in range(0, 16, 4)])
-        if type_str == 'STRING':
-            return value_str
-        elif type_str == 'BOOLEAN':
-            return value_str == "True"
-        elif type_str == 'INT':
-            return int(value_str)
-        elif type_str == 'FLOAT':
-            return float(value_str)
-        elif 'ARRAY' in type_str:
-            if not value_str:
-                return []
-            parts = value_str.split(',')
-            return [float(x) for x in parts] if 'FLOAT' in type_str else [int(x) for x in parts]
-    except:
+        parser = STRUCT_PARSERS.get(struct_type) or TYPE_PARSERS.get(type_str)
+        if parser is not None:
+            return parser(value_str)
+    except (ValueError, TypeError):
         return None
     return value_str
 
-def apply_xml_properties(blender_obj, xml_node):
+@functools.lru_cache(maxsize=4096)
+def parse_default_value(val_str):
+    """Parse a socket default such as "0.5" or "1.0,1.0,1.0,1.0".
+
+    Materials tend to repeat the exact same literals, so results are
+    memoized; vectors come back as tuples so cached values stay immutable.
+    """
+    if "," in val_str:
+        return tuple(parse_float_list(val_str))
+    return float(val_str)
+
+def parse_csv_array(strings, dtype=np.float64, width=None, element="array"):
+    """Parse a list of comma-separated number strings into one flat array.
+
+    The strings are joined once and tokenized by a single np.fromstring
+    call instead of a float()/int() per value.  Older numpy stops at the
+    first malformed number and returns what it has (newer numpy raises), so
+    when every string holds width numbers the total is checked too.  Either
+    way the ValueError names element, rather than surfacing later as a
+    length mismatch in foreach_set.
+    """
+    if not strings:
+        return np.empty(0, dtype=dtype)
+    try:
+        arr = np.fromstring(",".join(strings), sep=',', dtype=dtype)
+    except ValueError as e:
+        raise ValueError(f"Malformed numbers in {element}: {e}") from e
+    if width is not None:
+        check_count(arr, width * len(strings), element)
+    return arr
+
+def check_count(arr, expected, element):
+    """Raise ValueError unless arr holds exactly expected values."""
+    if len(arr) != expected:
+        raise ValueError(f"Malformed numbers in {element}: expected {expected} values, parsed {len(arr)}")
+
+def parse_base64_array(blob, dtype):
+    """Decode a base64 attribute written by the exporter's binary geometry mode.
+
+    The bytes are little-endian values of dtype and are used as-is by
+    np.frombuffer; no text tokenizing at all.
+    """
+    if not blob:
+        return np.empty(0, dtype=dtype)
+    return np.frombuffer(base64.b64decode(blob), dtype=dtype)
+
+def parse_float_pairs(strings, element="array"):
+    """Parse a list of "x,y" strings into an (N, 2) array in one numpy pass."""
+    return parse_csv_array(strings, np.float32, 2, element).reshape(-1, 2)
+
+def settable_props(blender_obj):
+    """Names of the writable RNA properties of blender_obj's type, cached per type."""
+    rna = blender_obj.bl_rna
+    names = SETTABLE_PROPS.get(rna.identifier)
+    if names is None:
+        names = frozenset(p.identifier for p in rna.properties if not p.is_readonly)
+        SETTABLE_PROPS[rna.identifier] = names
+    return names
+
+@functools.lru_cache(maxsize=None)
+def keyframe_enum_values(prop_name):
+    """Map a Keyframe enum property's identifiers to the ints foreach_set takes."""
+    prop = bpy.types.Keyframe.bl_rna.properties[prop_name]
+    return {item.identifier: item.value for item in prop.enum_items}
+
+if HAVE_LXML:
+    # Compiled once and evaluated by libxml2, name predicate included.
+    PROP_VALUE_XPATH = ET.XPath("Properties/Prop[@name=$name]/@value", smart_strings=False)
+
+def get_prop_value(xml_node, name):
+    """Return the value of xml_node's <Properties>/<Prop name=...>, or None.
+
+    Same result as find("Properties/Prop[@name='...']").get("value").  With
+    lxml this is one precompiled XPath call; otherwise a plain-tag find()
+    stays in C instead of going through ElementPath's predicate matching on
+    every call.
+    """
+    if HAVE_LXML:
+        values = PROP_VALUE_XPATH(xml_node, name=name)
+        return values[0] if values else None
+
     props = xml_node.find("Properties")
-    if not props:
-        return
+    if props is None:
+        return None
+    for prop in props:
+        if prop.get("name") == name:
+            return prop.get("value")
+    return None
+
+# Props apply_xml_properties never sets directly.  matrix_world is a derived
+# value: applying it after parenting double-transforms the object.
+SKIP_PROPS = frozenset({
+    'name', 'type', 'is_readonly', 'data', 'use_nodes',
+    'matrix_basis', 'matrix_local', 'matrix_custom', 'matrix_world',
+})
+# Props recorded in HIERARCHY_MAP, keyed by Prop name -> HIERARCHY_MAP key
+HIERARCHY_KEYS = {
+    'parent': 'parent',
+    'parent_type': 'type',
+    'parent_bone': 'bone',
+    'head': 'head',
+    'tail': 'tail',
+    'matrix_parent_inverse': 'inv',
+    'rotation_mode': 'rotation_mode',
+}
+# Transform props, applied once parents are in place
+TRANSFORM_PROPS = frozenset({
+    'location', 'rotation_euler', 'rotation_quaternion', 'scale',
+    'delta_location', 'delta_rotation_euler', 'delta_scale',
+})
+
+def parse_xml_properties(xml_node):
+    """Decode xml_node's <Properties> into (name, type, value) tuples.
+
+    Props in SKIP_PROPS are dropped.  Returns None when the element has no
+    <Properties>.  Touches no bpy state, so the result can be queued and
+    applied later without keeping the XML around.
+    """
+    # An Element's truth value is its child count, so presence is tested
+    # with "is None" throughout; "if not props" skipped empty elements.
+    props = xml_node.find("Properties")
+    if props is None:
+        return None
 
-    if blender_obj not in HIERARCHY_MAP:
-        HIERARCHY_MAP[blender_obj] = {
+    parsed = []
+    for prop in props.findall("Prop"):
+        # Names and type tags repeat across every element; interning keeps one
+        # copy of each and turns the set/dict lookups into pointer checks.
+        attrib = prop.attrib
+        name = attrib.get("name")
+        # A Prop without a name can't be applied to anything
+        if name is None:
+            continue
+        name = sys.intern(name)
+        if name in SKIP_PROPS:
+            continue
+        type_str = sys.intern(attrib.get("type") or "")
+        # Only vector/rotation/matrix props carry a structure_type
+        struct_type = attrib.get("structure_type")
+        if struct_type:
+            struct_type = sys.intern(struct_type)
+        val = parse_typed_value(attrib.get("value"), type_str, struct_type)
+        parsed.append((name, type_str, val))
+    return parsed
+
+def apply_properties(blender_obj, parsed):
+    """Apply parse_xml_properties output to blender_obj.
+
+    Hierarchy and transform props are recorded in HIERARCHY_MAP and
+    pointers in DEFERRED_LINKS; everything else is set directly.
+    """
+    # Register even without <Properties>; callers rely on the entry existing.
+    data = HIERARCHY_MAP.get(blender_obj)
+    if data is None:
+        data = HIERARCHY_MAP[blender_obj] = {
             'parent': None,
             'type': None,
             'bone': None,
@@ -81,96 +270,122 @@ def apply_xml_properties(blender_obj, xml_node):
             'transforms': [],
             'rotation_mode': None,
         }
+    if not parsed:
+        return
 
-    data = HIERARCHY_MAP[blender_obj]
-
-    for prop in props.findall("Prop"):
-        name = prop.get("name")
-        val = parse_typed_value(prop.get("value"), prop.get("type"), prop.get("structure_type", ""))
-
-        if name in ['name', 'type', 'is_readonly', 'data',
-                    'matrix_basis', 'matrix_local', 'matrix_custom', 'use_nodes']:
-            continue
-
-        if name == 'parent':
-            data['parent'] = val
-        elif name == 'parent_type':
-            data['type'] = val
-        elif name == 'parent_bone':
-            data['bone'] = val
-        elif name == 'head':
-            data['head'] = val
-        elif name == 'tail':
-            data['tail'] = val
-        elif name == 'matrix_parent_inverse':
-            data['inv'] = val
-        elif name == 'matrix_world':
-            # Derived value — skip entirely. Applying it after parenting double‑transforms the object.
-            pass
-        elif name == 'rotation_mode':
-            data['rotation_mode'] = val
-        elif name in ['location', 'rotation_euler', 'rotation_quaternion', 'scale',
-                      'delta_location', 'delta_rotation_euler', 'delta_scale']:
+    settable = settable_props(blender_obj)
+    for name, type_str, val in parsed:
+        key = HIERARCHY_KEYS.get(name)
+        if key is not None:
+            data[key] = val
+        elif name in TRANSFORM_PROPS:
             data['transforms'].append((name, val))
-        elif prop.get("type") == 'POINTER':
+        elif type_str == 'POINTER':
             DEFERRED_LINKS.append((blender_obj, name, val))
-        else:
+        elif val is not None and name in settable:
             try:
                 setattr(blender_obj, name, val)
-            except:
+            except (AttributeError, TypeError, ValueError):
                 pass
 
-def rebuild_action_from_baked_pose(arm_obj, baked_node, action_name="BakedFromXML"):
-    scene = bpy.context.scene
+def apply_xml_properties(blender_obj, xml_node):
+    apply_properties(blender_obj, parse_xml_properties(xml_node))
 
+def parse_baked_pose(baked_node):
+    """Group a <BakedPose>'s samples by bone: {name: [(frame, loc, rot, scale)]}.
+
+    The loc/rot/scale strings are kept as-is and tokenized per channel by
+    rebuild_action_from_baked_pose.  Touches no bpy state.
+    """
+    samples = {}
+    for frame_node in baked_node.findall("Frame"):
+        f = int(frame_node.get("f", "1"))
+        for bone_node in frame_node.findall("Bone"):
+            samples.setdefault(bone_node.get("name"), []).append((
+                f,
+                bone_node.find("Loc").get("v"),
+                bone_node.find("RotQ").get("v"),
+                bone_node.find("Scale").get("v"),
+            ))
+    return samples
+
+def new_action_channelbag(action, id_type, slot_name):
+    """Add a slot to action and return (slot, channelbag).
+
+    Blender 5.0 removed Action.fcurves; F-Curves live in the channelbag of
+    the slot that animates a given ID.
+    """
+    slot = action.slots.new(id_type, slot_name)
+    return slot, anim_utils.action_ensure_channelbag_for_slot(action, slot)
+
+def rebuild_action_from_baked_pose(arm_obj, samples, bone_names, action_name="BakedFromXML"):
+    """Create arm_obj's action from parse_baked_pose samples.
+
+    Called while the <ArmatureData> is imported, before its bones exist, so
+    the action is created in file order ahead of the <Actions> section and
+    keeps the name it had.  Bones are checked against bone_names; the pose
+    itself is set later by pose_last_baked_sample.
+    """
     if not arm_obj.animation_data:
         arm_obj.animation_data_create()
 
     action = bpy.data.actions.new(action_name)
+    slot, channelbag = new_action_channelbag(action, 'OBJECT', arm_obj.name)
     arm_obj.animation_data.action = action
+    arm_obj.animation_data.action_slot = slot
 
     print(f"DEBUG: Created Action '{action.name}' for {arm_obj.name}")
 
-    frames = baked_node.findall("Frame")
-    if not frames:
+    if not samples:
         print("DEBUG: No frames found in XML.")
         return action
 
-    for frame_node in frames:
-        f = int(frame_node.get("f", "1"))
-        scene.frame_set(f)
-
-        for bone_node in frame_node.findall("Bone"):
-            name = bone_node.get("name")
-            pbone = arm_obj.pose.bones.get(name)
-            if not pbone:
-                print(f"MISSING Bone name {name} in XML")
-                continue
-
-            loc = [float(x) for x in bone_node.find("Loc").get("v").split(",")]
-            rot = [float(x) for x in bone_node.find("RotQ").get("v").split(",")]
-            scl = [float(x) for x in bone_node.find("Scale").get("v").split(",")]
-
-            pbone.location = loc
-            pbone.rotation_mode = 'QUATERNION'
-            pbone.rotation_quaternion = rot
-            pbone.scale = scl
-
-            try:
-                pbone.keyframe_insert(data_path="location", frame=f)
-                pbone.keyframe_insert(data_path="rotation_quaternion", frame=f)
-                pbone.keyframe_insert(data_path="scale", frame=f)
-                bpy.context.view_layer.update()
-            except Exception as e:
-                print(f"Error inserting keyframe for {name}: {e}")
+    # Each channel's F-Curve is written in bulk.  keyframe_insert per bone
+    # per frame needed the scene frame moved to f and re-evaluated the
+    # depsgraph on every call.
+    for name, rows in samples.items():
+        if name not in bone_names:
+            print(f"MISSING Bone name {name} in XML")
+            continue
+        frame_numbers = np.array([row[0] for row in rows], dtype=np.float32)
+        bone_path = f'pose.bones["{bpy.utils.escape_identifier(name)}"]'
+
+        for column, (prop, size) in enumerate((("location", 3), ("rotation_quaternion", 4), ("scale", 3)), 1):
+            values = parse_csv_array([row[column] for row in rows], np.float32, size,
+                                     f"<BakedPose> bone {name}").reshape(-1, size)
+            for index in range(size):
+                fcurve = channelbag.fcurves.new(f"{bone_path}.{prop}", index=index, group_name=name)
+                points = fcurve.keyframe_points
+                points.add(len(rows))
+                points.foreach_set("co", np.column_stack((frame_numbers, values[:, index])).ravel())
+                fcurve.update()
 
     print(f"DEBUG: Finished importing action '{action.name}'")
     return action
 
+def pose_last_baked_sample(arm_obj, samples):
+    """Leave each baked bone in quaternion mode at its last sample, as the
+    per-frame keyframe_insert calls did.  Needs the bones to exist.
+    """
+    pbmap = {pb.name: pb for pb in arm_obj.pose.bones}
+    for name, rows in samples.items():
+        pbone = pbmap.get(name)
+        if pbone is None:
+            continue
+        _, loc, rot, scale = rows[-1]
+        pbone.rotation_mode = 'QUATERNION'
+        pbone.location = parse_float_list(loc)
+        pbone.rotation_quaternion = parse_float_list(rot)
+        pbone.scale = parse_float_list(scale)
+
 def rebuild_full_node_graph(mat, nodegraph_node):
     tree = mat.node_tree
     tree.nodes.clear()
     node_map = {}
+    # Bound once; these are looked up for every node and link otherwise
+    nodes_new = tree.nodes.new
+    links_new = tree.links.new
+    images_get = bpy.data.images.get
 
     for n_el in nodegraph_node.findall("Node"):
         bl_idname = n_el.get("type")
@@ -178,22 +393,23 @@ def rebuild_full_node_graph(mat, nodegraph_node):
         loc_str = n_el.get("loc", "0,0")
 
         try:
-            node = tree.nodes.new(bl_idname)
-        except:
+            node = nodes_new(bl_idname)
+        except RuntimeError:
             print(f"  [Mat: {mat.name}] Unknown node type: {bl_idname}")
             continue
 
         node.name = name
         try:
-            x, y = [float(x) for x in loc_str.split(',')]
+            x, y = parse_float_list(loc_str)
             node.location = (x, y)
-        except:
+        except ValueError:
             pass
 
         if node.type == 'TEX_IMAGE':
             img_name = n_el.get("image")
-            if img_name and img_name in bpy.data.images:
-                node.image = bpy.data.images[img_name]
+            img = images_get(img_name) if img_name else None
+            if img:
+                node.image = img
 
         label = n_el.get("label")
         if label:
@@ -202,15 +418,56 @@ def rebuild_full_node_graph(mat, nodegraph_node):
         node_map[name] = node
 
     for l_el in nodegraph_node.findall("Link"):
-        fn = node_map.get(l_el.get("from_node"))
-        tn = node_map.get(l_el.get("to_node"))
+        attrib = l_el.attrib
+        fn = node_map.get(attrib.get("from_node"))
+        tn = node_map.get(attrib.get("to_node"))
         if not fn or not tn:
             continue
 
-        fs = fn.outputs.get(l_el.get("from_socket"))
-        ts = tn.inputs.get(l_el.get("to_socket"))
+        fs = fn.outputs.get(attrib.get("from_socket"))
+        ts = tn.inputs.get(attrib.get("to_socket"))
         if fs and ts:
-            tree.links.new(fs, ts)
+            links_new(fs, ts)
+
+def build_bsdf_skeleton(tree):
+    tree.nodes.clear()
+    bsdf = tree.nodes.new('ShaderNodeBsdfPrincipled')
+    bsdf.location = (0, 300)
+    out = tree.nodes.new('ShaderNodeOutputMaterial')
+    out.location = (300, 300)
+    tree.links.new(bsdf.outputs[0], out.inputs[0])
+    return bsdf
+
+def find_bsdf(tree):
+    """Return the tree's Principled BSDF node, or None.
+
+    Materials copied from the template keep the node's default name, so a
+    keyed lookup finds it without scanning the whole tree.
+    """
+    bsdf = tree.nodes.get("Principled BSDF")
+    if bsdf is not None and bsdf.type == 'BSDF_PRINCIPLED':
+        return bsdf
+    return next((n for n in tree.nodes if n.type == 'BSDF_PRINCIPLED'), None)
+
+def new_material(name):
+    """Create a material as a copy of a hidden template that already holds
+    the Principled BSDF -> Material Output skeleton.  One ID copy replaces
+    building the same nodes and link again for every material.
+    """
+    global MATERIAL_TEMPLATE
+    if MATERIAL_TEMPLATE is None:
+        MATERIAL_TEMPLATE = bpy.data.materials.new(".BSDFTemplate")
+        MATERIAL_TEMPLATE.use_nodes = True
+        build_bsdf_skeleton(MATERIAL_TEMPLATE.node_tree)
+    mat = MATERIAL_TEMPLATE.copy()
+    mat.name = name
+    return mat
+
+def remove_material_template():
+    global MATERIAL_TEMPLATE
+    if MATERIAL_TEMPLATE is not None:
+        bpy.data.materials.remove(MATERIAL_TEMPLATE)
+        MATERIAL_TEMPLATE = None
 
 def reconstruct_material_nodes(mat, mat_node):
     """
@@ -230,18 +487,18 @@ def reconstruct_material_nodes(mat, mat_node):
 
         # Apply PrincipledSummary if present
         ps = mat_node.find("PrincipledSummary")
-        if ps:
-            bsdf = next((n for n in tree.nodes if n.type == 'BSDF_PRINCIPLED'), None)
+        if ps is not None:
+            bsdf = find_bsdf(tree)
             if bsdf:
                 for c_el in ps.findall("Color"):
                     name = c_el.get("name")
                     if name == "BaseColor":
-                        rgba = [float(x) for x in c_el.get("rgba").split(',')]
+                        rgba = parse_default_value(c_el.get("rgba"))
                         if "Base Color" in bsdf.inputs:
                             bsdf.inputs["Base Color"].default_value = rgba
                 for v_el in ps.findall("Value"):
                     name = v_el.get("name")
-                    v = float(v_el.get("v"))
+                    v = parse_default_value(v_el.get("v"))
                     if name in bsdf.inputs:
                         bsdf.inputs[name].default_value = v
 
@@ -301,24 +558,23 @@ def reconstruct_material_nodes(mat, mat_node):
         return
 
     # CASE 2: No NodeGraph → simple Principled + optional PrincipledSummary + magenta fallback
-    tree.nodes.clear()
-    bsdf = tree.nodes.new('ShaderNodeBsdfPrincipled')
-    bsdf.location = (0, 300)
-    out = tree.nodes.new('ShaderNodeOutputMaterial')
-    out.location = (300, 300)
-    tree.links.new(bsdf.outputs[0], out.inputs[0])
+    # Materials come from new_material(), so the skeleton is normally there
+    # already; build it only for materials created some other way.
+    bsdf = find_bsdf(tree)
+    if bsdf is None:
+        bsdf = build_bsdf_skeleton(tree)
 
     ps = mat_node.find("PrincipledSummary")
-    if ps:
+    if ps is not None:
         for c_el in ps.findall("Color"):
             name = c_el.get("name")
             if name == "BaseColor":
-                rgba = [float(x) for x in c_el.get("rgba").split(',')]
+                rgba = parse_default_value(c_el.get("rgba"))
                 if "Base Color" in bsdf.inputs:
                     bsdf.inputs["Base Color"].default_value = rgba
         for v_el in ps.findall("Value"):
             name = v_el.get("name")
-            v = float(v_el.get("v"))
+            v = parse_default_value(v_el.get("v"))
             if name in bsdf.inputs:
                 bsdf.inputs[name].default_value = v
 
@@ -338,7 +594,7 @@ def reconstruct_material_nodes(mat, mat_node):
 
         try:
             tree.links.new(tex_node.outputs["Color"], bsdf.inputs["Base Color"])
-        except:
+        except (KeyError, RuntimeError):
             pass
     elif paint_img_name and paint_img_name in bpy.data.images:
         tex_node = tree.nodes.new("ShaderNodeTexImage")
@@ -347,12 +603,17 @@ def reconstruct_material_nodes(mat, mat_node):
         tree.nodes.active = tex_node
         try:
             tree.links.new(tex_node.outputs["Color"], bsdf.inputs["Base Color"])
-        except:
+        except (KeyError, RuntimeError):
             pass
 
 def rebuild_armature_from_xml(armature_data_node):
-    from mathutils import Vector
+    """Create an armature object from an <ArmatureData> record.
 
+    Bones can only be added in edit mode, so they are parsed here and
+    queued in DEFERRED_ARMATURES; build_deferred_armatures creates them
+    for every armature in a single edit-mode session.  The baked action is
+    created right away so it precedes the <Actions> section, as before.
+    """
     arm_data_name = armature_data_node.get("name", "Armature")
     arm_obj_name  = armature_data_node.get("object_name", arm_data_name)
     arm_data = bpy.data.armatures.new(arm_data_name)
@@ -369,408 +630,720 @@ def rebuild_armature_from_xml(armature_data_node):
     HIERARCHY_MAP[arm_data] = {'object': arm_obj}
 
     bpy.context.scene.collection.objects.link(arm_obj)
-    bpy.context.view_layer.objects.active = arm_obj
-    bpy.ops.object.mode_set(mode='EDIT')
 
-    bones_node = armature_data_node.find("Bones")
-    bone_map = {}
+    # One pass over the XML; heads and tails are tokenized in bulk here and
+    # written with a single foreach_set each once every bone exists.
+    bones = [(b.get("name"), b.get("head"), b.get("tail"), b.get("parent_name"))
+             for b in armature_data_node.find("Bones").iter("Bone")]
+    heads = parse_csv_array([b[1] for b in bones], np.float32, 3, f"<ArmatureData {arm_data_name}> bone heads")
+    tails = parse_csv_array([b[2] for b in bones], np.float32, 3, f"<ArmatureData {arm_data_name}> bone tails")
+    parents = [(name, parent_name) for name, _, _, parent_name in bones]
+
+    samples = None
+    baked_node = armature_data_node.find("BakedPose")
+    if baked_node is not None:
+        samples = parse_baked_pose(baked_node)
+        rebuild_action_from_baked_pose(arm_obj, samples, {name for name, _ in parents},
+                                       action_name=baked_node.get("name", f"{arm_obj.name}__Baked"))
+
+    DEFERRED_ARMATURES.append((arm_obj, heads, tails, parents, samples))
+
+    apply_xml_properties(arm_data, armature_data_node)
+
+    return arm_obj
+
+def build_deferred_armatures():
+    """Create the bones of every queued armature, then pose the baked ones.
 
-    for bone_node in bones_node.iter("Bone"):
-        name = bone_node.get("name")
-        head = Vector(map(float, bone_node.get("head").split(",")))
-        tail = Vector(map(float, bone_node.get("tail").split(",")))
+    All armatures are selected and switched into edit mode together, so
+    there is one EDIT/OBJECT mode_set pair for the whole import rather than
+    one per armature.
+    """
+    if not DEFERRED_ARMATURES:
+        return
+
+    view_layer = bpy.context.view_layer
+    for obj in view_layer.objects:
+        obj.select_set(False)
+    for arm_obj, _, _, _, _ in DEFERRED_ARMATURES:
+        arm_obj.select_set(True)
+    view_layer.objects.active = DEFERRED_ARMATURES[0][0]
+    bpy.ops.object.mode_set(mode='EDIT')
 
-        eb = arm_data.edit_bones.new(name)
-        eb.head = head
-        eb.tail = tail
-        bone_map[name] = eb
+    for arm_obj, heads, tails, parents, _ in DEFERRED_ARMATURES:
+        edit_bones = arm_obj.data.edit_bones
+        bone_map = {name: edit_bones.new(name) for name, _ in parents}
+        edit_bones.foreach_set("head", heads)
+        edit_bones.foreach_set("tail", tails)
 
-    for bone_node in bones_node.iter("Bone"):
-        name = bone_node.get("name")
-        parent_name = bone_node.get("parent_name")
-        if parent_name and parent_name in bone_map:
-            bone_map[name].parent = bone_map[parent_name]
+        for name, parent_name in parents:
+            parent = bone_map.get(parent_name) if parent_name else None
+            if parent is not None:
+                bone_map[name].parent = parent
 
     bpy.ops.object.mode_set(mode='OBJECT')
+    for arm_obj, _, _, _, _ in DEFERRED_ARMATURES:
+        arm_obj.select_set(False)
 
-    apply_xml_properties(arm_data, armature_data_node)
+    for arm_obj, _, _, _, samples in DEFERRED_ARMATURES:
+        if samples:
+            pose_last_baked_sample(arm_obj, samples)
 
-    baked_node = armature_data_node.find("BakedPose")
-    if baked_node is not None:
-        act_name = baked_node.get("name", f"{arm_obj.name}__Baked")
-        rebuild_action_from_baked_pose(arm_obj, baked_node, action_name=act_name)
+def find_texture(filename, xml_dir):
+    """Find filename anywhere under xml_dir, ignoring case.
 
-    return arm_obj
+    The directory tree is walked once and indexed; a recursive
+    image_utils.load_image walked it again for every image.
+    """
+    global TEXTURE_INDEX
+    if TEXTURE_INDEX is None:
+        TEXTURE_INDEX = {}
+        for root, _, files in os.walk(xml_dir):
+            for f in files:
+                TEXTURE_INDEX.setdefault(f.lower(), os.path.join(root, f))
+    return TEXTURE_INDEX.get(filename.lower())
+
+def import_image(i_node, tex_dir_abs, xml_dir):
+    rel_path = i_node.get("filepath")
+    name = i_node.get("name")
+    img = None
+
+    if rel_path:
+        filename = os.path.basename(rel_path)
+        manual_path = os.path.join(tex_dir_abs, filename)
+        if os.path.exists(manual_path):
+            try:
+                img = bpy.data.images.load(manual_path)
+            except RuntimeError:
+                pass
 
-def import_libraries(root, xml_dir):
-    libs = root.find("Libraries")
-    if not libs:
-        return
+        if not img:
+            found_path = find_texture(filename, xml_dir)
+            if found_path:
+                try:
+                    img = bpy.data.images.load(found_path)
+                except RuntimeError:
+                    pass
 
-    tex_dir_abs = os.path.join(xml_dir, "textures")
-    if os.path.exists(tex_dir_abs):
-        print(f"Scanning textures in: {tex_dir_abs}")
+        if img:
+            img.name = name
+            print(f"Loaded Image: {filename} -> '{img.name}'")
+        else:
+            print(f"FAILED to load Image: {filename}")
+
+    if not img:
+        img = bpy.data.images.new(name, 32, 32)
+        img.generated_color = (1, 0, 1, 1)
+
+    apply_xml_properties(img, i_node)
+
+def import_material(mat_node):
+    # Meshes precede Materials in the file, so a slot may already have
+    # created this material as a placeholder.
+    name = mat_node.get("name")
+    mat = bpy.data.materials.get(name) or new_material(name)
+    mat.use_nodes = True
+    reconstruct_material_nodes(mat, mat_node)
+    apply_xml_properties(mat, mat_node)
+
+    vc = mat_node.find("ViewportColor")
+    if vc is not None and hasattr(mat, "diffuse_color"):
+        try:
+            r = float(vc.get("r", "1.0"))
+            g = float(vc.get("g", "1.0"))
+            b = float(vc.get("b", "1.0"))
+            a = float(vc.get("a", "1.0"))
+            mat.diffuse_color = (r, g, b, a)
+        except (ValueError, TypeError):
+            pass
+
+def parse_polygon_nodes(poly_nodes):
+    """Decode text <P> elements into vertex_indices, loop_starts, mat_indices and smooth flags."""
+    # Polygons are parsed in one pass with a -1 after each one (vertex
+    # indices are never negative); the markers give every polygon's size
+    # without counting its indices in Python.
+    face_strs = [p.get("i") for p in poly_nodes]
+    flat = parse_csv_array(face_strs and [",-1,".join(face_strs), "-1"], np.int32,
+                           element="<Polygons> vertex indices")
+    ends = np.flatnonzero(flat < 0)
+    vertex_indices = flat[flat >= 0]
+    loop_totals = np.diff(ends, prepend=-1) - 1
+    # A malformed index stops the parse early, leaving markers missing
+    check_count(ends, len(poly_nodes), "<Polygons> vertex indices")
+    loop_starts = (ends - np.arange(len(ends)) - loop_totals).astype(np.int32)
+    mat_indices = parse_csv_array([p.get("m", "0") for p in poly_nodes], np.int32, 1, "<Polygons> material indices")
+    smooth = [p.get("smooth", "False") == "True" for p in poly_nodes]
+    return vertex_indices, loop_starts, mat_indices, smooth
+
+def parse_mesh_geometry(geo):
+    """Decode a <Geometry> element into flat numpy arrays.
+
+    Touches no bpy state; the arrays are laid out for build_mesh_geometry
+    and the foreach_set calls in import_mesh (co is 3 floats per vertex,
+    UVs 2 floats per loop, loop_starts/vertex_indices as Blender stores
+    polygons).
+
+    <Vertices> and <Polygons> written with encoding="base64" carry their
+    arrays as packed little-endian blobs instead of one child per element.
+    """
+    verts_node = geo.find("Vertices")
+    if verts_node.get("encoding") == "base64":
+        co = parse_base64_array(verts_node.get("co"), np.dtype('<f4'))
     else:
-        print(f"WARNING: Texture dir not found at: {tex_dir_abs}")
+        co = parse_csv_array([v.get("co") for v in verts_node.findall("V")], np.float32, 3, "<Vertices>")
+
+    polys_node = geo.find("Polygons")
+    if polys_node.get("encoding") == "base64":
+        vertex_indices = parse_base64_array(polys_node.get("i"), np.dtype('<i4'))
+        loop_totals = parse_base64_array(polys_node.get("sizes"), np.dtype('<i4'))
+        loop_starts = (np.cumsum(loop_totals) - loop_totals).astype(np.int32)
+        mat_indices = parse_base64_array(polys_node.get("m"), np.dtype('<i4'))
+        smooth = parse_base64_array(polys_node.get("smooth"), np.bool_)
+        if not len(smooth):
+            smooth = np.zeros(len(loop_totals), dtype=np.bool_)
+    else:
+        vertex_indices, loop_starts, mat_indices, smooth = parse_polygon_nodes(polys_node.findall("P"))
+
+    uv_layers = []
+    uv_layers_node = geo.find("UVLayers")
+    if uv_layers_node is not None:
+        for layer_node in uv_layers_node.findall("Layer"):
+            uv_data = parse_csv_array([d.get("uv") for d in layer_node.findall("d")], np.float32, 2,
+                                      f"<UVLayers> layer {layer_node.get('name')}")
+            uv_layers.append((layer_node.get("name"), uv_data, layer_node.get("active") == "True"))
+
+    return co, loop_starts, vertex_indices, mat_indices, smooth, uv_layers
+
+def parse_vertex_weights(g_node):
+    """Decode a vertex group's <VW> elements into (ids, weights) arrays."""
+    vws = g_node.findall("VW")
+    element = f"<VertexGroups> group {g_node.get('name')}"
+    return (parse_csv_array([vw.get("id") for vw in vws], np.int32, 1, element),
+            parse_csv_array([vw.get("w") for vw in vws], np.float32, 1, element))
+
+def set_vertex_positions(mesh, co):
+    """Write flat float32 coordinates into mesh.vertices.
+
+    Since Blender 3.5 positions are one contiguous float3 array, so when the
+    vertex pointers show that layout the whole array is copied with a single
+    memmove.  Older packed-vertex layouts fall back to foreach_set.
+    """
+    verts = mesh.vertices
+    if (len(verts) > 1 and co.dtype == np.float32 and co.flags.c_contiguous
+            and co.nbytes == 12 * len(verts)):
+        base = verts[0].as_pointer()
+        if verts[1].as_pointer() - base == 12:
+            ctypes.memmove(base, co.ctypes.data, co.nbytes)
+            return
+    verts.foreach_set("co", co)
+
+def build_mesh_geometry(mesh, co, loop_starts, vertex_indices):
+    """Fill an empty mesh straight from flat arrays.
+
+    Same result as from_pydata(verts, [], faces) without its Python-side
+    flattening: one foreach_set per attribute, then edges are derived from
+    the polygons as from_pydata does.
+    """
+    mesh.vertices.add(len(co) // 3)
+    set_vertex_positions(mesh, co)
+    mesh.loops.add(len(vertex_indices))
+    mesh.loops.foreach_set("vertex_index", vertex_indices)
+    mesh.polygons.add(len(loop_starts))
+    mesh.polygons.foreach_set("loop_start", loop_starts)
+    mesh.update(calc_edges=True)
+
+def parse_keyframes(fc_node):
+    """Decode an FCurve's <KP> elements into numpy arrays, or None if it has none.
+
+    Touches no bpy state.  co/hl/hr are tokenized in one C pass per attribute;
+    missing handles parse as a dummy pair so rows stay aligned and are flagged
+    in has_hl/has_hr.
+    """
+    kps = fc_node.findall("KP")
+    if not kps:
+        return None
+    hl_strs = [kp_node.get("hl") for kp_node in kps]
+    hr_strs = [kp_node.get("hr") for kp_node in kps]
+    element = f"<FCurve {fc_node.get('data_path')}[{fc_node.get('array_index')}]> keyframes"
+    return {
+        "co": parse_float_pairs([kp_node.get("co") for kp_node in kps], element),
+        "hl": parse_float_pairs([s or "0,0" for s in hl_strs], element),
+        "hr": parse_float_pairs([s or "0,0" for s in hr_strs], element),
+        "has_hl": np.array([bool(s) for s in hl_strs]),
+        "has_hr": np.array([bool(s) for s in hr_strs]),
+        "interpolation": [sys.intern(kp_node.get("interpolation", 'BEZIER')) for kp_node in kps],
+    }
 
-    # Images
-    if libs.find("Images"):
-        for i_node in libs.find("Images").findall("Image"):
-            rel_path = i_node.get("filepath")
-            name = i_node.get("name")
-            img = None
-
-            if rel_path:
-                filename = os.path.basename(rel_path)
-                manual_path = os.path.join(tex_dir_abs, filename)
-                if os.path.exists(manual_path):
-                    try:
-                        img = bpy.data.images.load(manual_path)
-                    except:
-                        pass
-
-                if not img:
-                    img = image_utils.load_image(filename, dirname=xml_dir, place_holder=False, recursive=True)
-
-                if img:
-                    img.name = name
-                    print(f"Loaded Image: {filename} -> '{img.name}'")
-                else:
-                    print(f"FAILED to load Image: {filename}")
-
-            if not img:
-                img = bpy.data.images.new(name, 32, 32)
-                img.generated_color = (1, 0, 1, 1)
-
-            apply_xml_properties(img, i_node)
-
-    # Materials
-    if libs.find("Materials"):
-        for mat_node in libs.find("Materials").findall("Material"):
-            mat = bpy.data.materials.new(mat_node.get("name"))
-            mat.use_nodes = True
-            reconstruct_material_nodes(mat, mat_node)
-            apply_xml_properties(mat, mat_node)
-
-            vc = mat_node.find("ViewportColor")
-            if vc and hasattr(mat, "diffuse_color"):
+def import_mesh(m_node):
+    mesh = bpy.data.meshes.new(m_node.get("name"))
+    geo = m_node.find("Geometry")
+    if geo is not None:
+        co, loop_starts, vertex_indices, mat_indices, smooth, uv_layers = parse_mesh_geometry(geo)
+        build_mesh_geometry(mesh, co, loop_starts, vertex_indices)
+
+        # Restore polygon smooth shading
+        try:
+            mesh.polygons.foreach_set("use_smooth", smooth)
+        except (AttributeError, TypeError):
+            pass
+
+        # Restore edge sharpness
+        edges_el = geo.find("Edges")
+        if edges_el is not None:
+            for e_el, edge in zip(edges_el.findall("E"), mesh.edges):
                 try:
-                    r = float(vc.get("r", "1.0"))
-                    g = float(vc.get("g", "1.0"))
-                    b = float(vc.get("b", "1.0"))
-                    a = float(vc.get("a", "1.0"))
-                    mat.diffuse_color = (r, g, b, a)
-                except:
+                    edge.use_edge_sharp = (e_el.get("sharp", "False") == "True")
+                except AttributeError:
                     pass
 
-    # Meshes
-    if libs.find("Meshes"):
-        for m_node in libs.find("Meshes").findall("Mesh"):
-            mesh = bpy.data.meshes.new(m_node.get("name"))
-            geo = m_node.find("Geometry")
-            if geo:
-                verts = [[float(x) for x in v.get("co").split(',')]
-                         for v in geo.find("Vertices").findall("V")]
-                faces = []
-                mat_indices = []
-                for p in geo.find("Polygons").findall("P"):
-                    faces.append([int(x) for x in p.get("i").split(',')])
-                    mat_indices.append(int(p.get("m", 0)))
-                mesh.from_pydata(verts, [], faces)
-
-                # Restore polygon smooth shading
-                polys = geo.find("Polygons")
-                if polys:
-                    for p_el, poly in zip(polys.findall("P"), mesh.polygons):
-                        try:
-                            poly.use_smooth = (p_el.get("smooth", "False") == "True")
-                        except:
-                            pass
+        slots = m_node.find("MaterialSlots")
+        if slots is not None:
+            for slot in slots.findall("Slot"):
+                mat_name = slot.get("name")
+                mat = bpy.data.materials.get(mat_name)
+                if not mat:
+                    mat = new_material(mat_name)
+                mesh.materials.append(mat)
+
+        if len(mat_indices) == len(mesh.polygons):
+            mesh.polygons.foreach_set("material_index", mat_indices)
+
+        for layer_name, uv_data, active in uv_layers:
+            uv_layer = mesh.uv_layers.new(name=layer_name)
+            if len(uv_data) == 2 * len(mesh.loops):
+                uv_layer.data.foreach_set("uv", uv_data)
+            if active:
+                mesh.uv_layers.active = uv_layer
+
+        # Shading
+        shading = geo.find("Shading")
+        if shading is not None:
+            try:
+                mesh.use_auto_smooth = (shading.get("use_auto_smooth", "False") == "True")
+            except AttributeError:
+                pass
+            try:
+                mesh.auto_smooth_angle = float(shading.get("auto_smooth_angle", "0.523599"))
+            except (AttributeError, ValueError):
+                pass
+            # has_custom_normals is a flag only; actual normals are not exported.
+
+        # ColorAttributes
+        color_attrs_node = geo.find("ColorAttributes")
+        if color_attrs_node is not None:
+            for attr_node in color_attrs_node.findall("ColorAttribute"):
+                name = attr_node.get("name", "Col")
+                domain = attr_node.get("domain", "POINT")
+                data_type = attr_node.get("data_type", "BYTE_COLOR")
 
-                # Restore edge sharpness
-                edges_el = geo.find("Edges")
-                if edges_el:
-                    for e_el, edge in zip(edges_el.findall("E"), mesh.edges):
+                try:
+                    color_layer = mesh.color_attributes.new(
+                        name=name,
+                        type=data_type,
+                        domain=domain
+                    )
+                except Exception as e:
+                    print(f"Failed to create color attribute {name} on {mesh.name}: {e}")
+                    continue
+
+                for c_el in attr_node.findall("Color"):
+                    idx = int(c_el.get("idx", "0"))
+                    rgba = parse_float_list(c_el.get("rgba"))
+                    if 0 <= idx < len(color_layer.data):
                         try:
-                            edge.use_edge_sharp = (e_el.get("sharp", "False") == "True")
-                        except:
+                            color_layer.data[idx].color = rgba
+                        except (TypeError, ValueError):
                             pass
 
-                slots = m_node.find("MaterialSlots")
-                if slots:
-                    for slot in slots.findall("Slot"):
-                        mat_name = slot.get("name")
-                        mat = bpy.data.materials.get(mat_name)
-                        if not mat:
-                            mat = bpy.data.materials.new(mat_name)
-                        mesh.materials.append(mat)
-
-                if len(mat_indices) == len(mesh.polygons):
-                    mesh.polygons.foreach_set("material_index", mat_indices)
-
-                if geo.find("UVLayers"):
-                    for layer_node in geo.find("UVLayers").findall("Layer"):
-                        uv_layer = mesh.uv_layers.new(name=layer_node.get("name"))
-                        uv_data = []
-                        for d in layer_node.findall("d"):
-                            uv_data.append([float(x) for x in d.get("uv").split(',')])
-
-                        if len(uv_data) == len(mesh.loops):
-                            for i, uv in enumerate(uv_data):
-                                uv_layer.data[i].uv = uv
-                        if layer_node.get("active") == "True":
-                            mesh.uv_layers.active = uv_layer
-
-                # Shading
-                shading = geo.find("Shading")
-                if shading:
-                    try:
-                        mesh.use_auto_smooth = (shading.get("use_auto_smooth", "False") == "True")
-                    except:
-                        pass
-                    try:
-                        mesh.auto_smooth_angle = float(shading.get("auto_smooth_angle", "0.523599"))
-                    except:
-                        pass
-                    # has_custom_normals is a flag only; actual normals are not exported.
-
-                # ColorAttributes
-                color_attrs_node = geo.find("ColorAttributes")
-                if color_attrs_node:
-                    for attr_node in color_attrs_node.findall("ColorAttribute"):
-                        name = attr_node.get("name", "Col")
-                        domain = attr_node.get("domain", "POINT")
-                        data_type = attr_node.get("data_type", "BYTE_COLOR")
+        # Paint mask flags
+        pmv = geo.find("PaintMaskVertex")
+        if pmv is not None and hasattr(mesh, "paint_mask_vertex"):
+            try:
+                mesh.paint_mask_vertex = (pmv.get("value", "False") == "True")
+            except (AttributeError, TypeError):
+                pass
+        upm = geo.find("UsePaintMask")
+        if upm is not None and hasattr(mesh, "use_paint_mask"):
+            try:
+                mesh.use_paint_mask = (upm.get("value", "False") == "True")
+            except (AttributeError, TypeError):
+                pass
 
-                        try:
-                            color_layer = mesh.color_attributes.new(
-                                name=name,
-                                type=data_type,
-                                domain=domain
-                            )
-                        except Exception as e:
-                            print(f"Failed to create color attribute {name} on {mesh.name}: {e}")
-                            continue
-
-                        for c_el in attr_node.findall("Color"):
-                            idx = int(c_el.get("idx", "0"))
-                            rgba = [float(x) for x in c_el.get("rgba").split(',')]
-                            if 0 <= idx < len(color_layer.data):
-                                try:
-                                    color_layer.data[idx].color = rgba
-                                except:
-                                    pass
-
-                # Paint mask flags
-                pmv = geo.find("PaintMaskVertex")
-                if pmv and hasattr(mesh, "paint_mask_vertex"):
-                    try:
-                        mesh.paint_mask_vertex = (pmv.get("value", "False") == "True")
-                    except:
-                        pass
-                upm = geo.find("UsePaintMask")
-                if upm and hasattr(mesh, "use_paint_mask"):
-                    try:
-                        mesh.use_paint_mask = (upm.get("value", "False") == "True")
-                    except:
-                        pass
-
-                mesh.validate()
-                mesh.update()
-
-            apply_xml_properties(mesh, m_node)
-
-    # Lights & Cameras
-    for col_name, data_col, rna_type in [
-        ("Lights", bpy.data.lights, 'POINT'),
-        ("Cameras", bpy.data.cameras, None)
-    ]:
-        if libs.find(col_name):
-            for node in libs.find(col_name):
-                item = data_col.new(node.get("name"), rna_type) if rna_type else data_col.new(node.get("name"))
-                apply_xml_properties(item, node)
-
-    # Armatures
-    if libs.find("Armatures"):
-        for arm_node in libs.find("Armatures").findall("ArmatureData"):
-            rebuild_armature_from_xml(arm_node)
-
-    # Actions
-    if libs.find("Actions"):
-        for act_node in libs.find("Actions").findall("Action"):
-            action = bpy.data.actions.new(act_node.get("name"))
-            apply_xml_properties(action, act_node)
-            for fc_node in act_node.findall("FCurve"):
-                fcurve = action.fcurves.new(
-                    data_path=fc_node.get("data_path"),
-                    index=int(fc_node.get("array_index"))
-                )
-                for kp_node in fc_node.findall("KP"):
-                    co = [float(x) for x in kp_node.get("co").split(',')]
-                    kp = fcurve.keyframe_points.insert(frame=co[0], value=co[1])
-                    kp.interpolation = kp_node.get("interpolation", 'BEZIER')
-                    kp.handle_left_type = 'FREE'
-                    kp.handle_right_type = 'FREE'
-                    if kp_node.get("hl"):
-                        kp.handle_left = [float(x) for x in kp_node.get("hl").split(',')]
-                    if kp_node.get("hr"):
-                        kp.handle_right = [float(x) for x in kp_node.get("hr").split(',')]
-
-def import_object(parent_node, collection, parent_obj=None):
-    for obj_node in parent_node.findall("Object"):
-        name = obj_node.get("name", "Obj")
-        data_name = obj_node.get("data_name")
-        data_block = None
-        if data_name:
-            data_block = (bpy.data.meshes.get(data_name) or
-                          bpy.data.lights.get(data_name) or
-                          bpy.data.cameras.get(data_name) or
-                          bpy.data.armatures.get(data_name))
-
-        # Special case: armature objects already created when importing armature data
-        if data_name and data_name in bpy.data.armatures:
-            arm_data = bpy.data.armatures[data_name]
-            if arm_data in HIERARCHY_MAP and 'object' in HIERARCHY_MAP[arm_data]:
-                obj = HIERARCHY_MAP[arm_data]['object']
-                if obj.name not in collection.objects:
-                    collection.objects.link(obj)
-
-                print(f"DEBUG: Applying properties to armature object {obj.name} from scene")
-
-                if obj.type == 'ARMATURE' and obj_node.find("Pose"):
-                    DEFERRED_POSES.append((obj, obj_node.find("Pose")))
-                if obj_node.get("active_action"):
-                    DEFERRED_ACTIONS.append((obj, obj_node.get("active_action")))
-
-                apply_xml_properties(obj, obj_node)
-
-                # Texture paint slots
-                tps = obj_node.find("TexturePaintSlots")
-                if tps and obj.type == 'MESH':
-                    for slot_el in tps.findall("Slot"):
-                        idx = int(slot_el.get("index", "0"))
-                        mat_name = slot_el.get("material")
-                        mat = bpy.data.materials.get(mat_name)
-                        if mat and idx < len(obj.material_slots):
-                            try:
-                                obj.material_slots[idx].material = mat
-                            except:
-                                pass
-
-                import_object(obj_node, collection, parent_obj=obj)
-                continue
+    apply_xml_properties(mesh, m_node)
 
-        existing_obj = next((o for o in bpy.data.objects if o.name == name and o.data == data_block), None)
-        if existing_obj:
-            obj = existing_obj
-        else:
-            obj = bpy.data.objects.new(name, data_block)
-            collection.objects.link(obj)
+def finalize_meshes():
+    """Validate every imported mesh once all records are in.
 
-        HIERARCHY_MAP[obj] = {
-            'parent': None,
-            'type': None,
-            'bone': None,
-            'inv': None,
-            'transforms': [],
-            'rotation_mode': None,
-        }
+    One pass here replaces the update()/validate() calls import_mesh made
+    for each mesh as it streamed past.  build_mesh_geometry has already
+    tagged each mesh with its update(calc_edges=True), so another update is
+    only needed when validate() had to change something.
+    """
+    for mesh in bpy.data.meshes:
+        if mesh.validate(verbose=False, clean_customdata=False):
+            mesh.update()
+
+def import_action(act_node):
+    action = bpy.data.actions.new(act_node.get("name"))
+    apply_xml_properties(action, act_node)
+    fc_nodes = act_node.findall("FCurve")
+    if not fc_nodes:
+        return
+
+    # The slot must match the kind of ID the action animates (shape keys,
+    # materials, lights...) or its curves are ignored; files without an
+    # exported id_root come from objects.  active_action and NLA strips
+    # then take the action's only slot.
+    id_type = get_prop_value(act_node, "id_root") or 'OBJECT'
+    _, channelbag = new_action_channelbag(action, id_type, action.name)
+    for fc_node in fc_nodes:
+        fcurve = channelbag.fcurves.new(
+            data_path=fc_node.get("data_path"),
+            index=int(fc_node.get("array_index"))
+        )
+        keys = parse_keyframes(fc_node)
+        if keys is None:
+            continue
+
+        # Size the curve once and fill it column by column; insert() per key
+        # re-sorts and recalculates the whole curve every time.
+        points = fcurve.keyframe_points
+        points.add(len(keys["interpolation"]))
+        points.foreach_set("co", keys["co"].ravel())
+        points.foreach_set("handle_left", keys["hl"].ravel())
+        points.foreach_set("handle_right", keys["hr"].ravel())
+        interpolation = keyframe_enum_values("interpolation")
+        points.foreach_set("interpolation",
+                           np.array([interpolation[i] for i in keys["interpolation"]], dtype=np.int32))
+
+        # Stored handles are FREE.  A handle missing from the file is left
+        # AUTO_CLAMPED so update() computes it, then frozen as FREE too,
+        # which is what insert() followed by setting FREE produced.
+        handle_types = keyframe_enum_values("handle_left_type")
+        free, auto = handle_types['FREE'], handle_types['AUTO_CLAMPED']
+        has_hl, has_hr = keys["has_hl"], keys["has_hr"]
+        points.foreach_set("handle_left_type", np.where(has_hl, free, auto).astype(np.int32))
+        points.foreach_set("handle_right_type", np.where(has_hr, free, auto).astype(np.int32))
+        fcurve.update()
+        if not (has_hl.all() and has_hr.all()):
+            all_free = np.full(len(points), free, dtype=np.int32)
+            points.foreach_set("handle_left_type", all_free)
+            points.foreach_set("handle_right_type", all_free)
+
+def import_light(node):
+    apply_xml_properties(bpy.data.lights.new(node.get("name"), 'POINT'), node)
+
+def import_camera(node):
+    apply_xml_properties(bpy.data.cameras.new(node.get("name")), node)
+
+class DiscardTarget:
+    """Parser target that builds nothing; see check_well_formed."""
+    def close(self):
+        pass
+
+def check_well_formed(abs_path):
+    """Raise ET.ParseError if abs_path is not well-formed XML.
+
+    The file is fed through a parser whose target keeps nothing, so this
+    costs a tokenizing pass and no tree.
+    """
+    if HAVE_LXML:
+        parser = ET.XMLParser(target=DiscardTarget(), huge_tree=True)
+    else:
+        parser = ET.XMLParser(target=DiscardTarget())
+    with open(abs_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            parser.feed(chunk)
+    parser.close()
+
+def import_libraries(abs_path, xml_dir):
+    """Stream the <Libraries> records through their importers.
+
+    Each record (Image, Mesh, Action, ...) is imported as soon as its closing
+    tag is parsed and then cleared, so only one record is held in memory at a
+    time instead of the whole document.  The <Scenes> element is small and is
+    returned intact for the caller to walk.
+    """
+    tex_dir_abs = os.path.join(xml_dir, "textures")
+    if os.path.exists(tex_dir_abs):
+        print(f"Scanning textures in: {tex_dir_abs}")
+    else:
+        print(f"WARNING: Texture dir not found at: {tex_dir_abs}")
 
-        if parent_obj:
-            obj.parent = parent_obj
+    importers = {
+        "Image": lambda node: import_image(node, tex_dir_abs, xml_dir),
+        "Material": import_material,
+        "Mesh": import_mesh,
+        "Light": import_light,
+        "Camera": import_camera,
+        "ArmatureData": rebuild_armature_from_xml,
+        "Action": import_action,
+    }
 
-        if obj.type == 'ARMATURE':
-            obj.show_in_front = True
-            obj.data.display_type = 'STICK'
+    scenes = None
+    if HAVE_LXML:
+        # libxml2 filters on tag in C, and every record and its already
+        # imported siblings are dropped from the tree as we go.
+        # remove_blank_text drops the indentation text nodes libxml2 would
+        # otherwise hand back between elements; huge_tree lifts the size limits
+        # that large meshes hit, and nothing here needs xml:id lookups.
+        records = ET.iterparse(abs_path, events=("end",), tag=(*importers, "Scenes"),
+                               remove_blank_text=True, huge_tree=True, collect_ids=False)
+        for _, elem in records:
+            section = elem.getparent()
+            if elem.tag == "Scenes":
+                scenes = elem
+                continue
+            libs = section.getparent() if section is not None else None
+            if libs is None or libs.tag != "Libraries":
+                continue
+            importers[elem.tag](elem)
+            elem.clear()
+            while elem.getprevious() is not None:
+                del section[0]
+        return scenes
+
+    in_libs = False
+    depth = 0
+    section = None
+    for event, elem in ET.iterparse(abs_path, events=("start", "end")):
+        if event == "start":
+            depth += 1
+            if depth == 2:
+                in_libs = (elem.tag == "Libraries")
+            elif depth == 3:
+                section = elem
+            continue
 
-        apply_xml_properties(obj, obj_node)
+        # depth: 1 = root, 2 = Libraries/Scenes, 3 = section, 4 = record
+        if in_libs and depth == 4:
+            importer = importers.get(elem.tag)
+            if importer is not None:
+                importer(elem)
+            # Detach the record as well, as the lxml branch does, so a large
+            # section does not keep one empty element per record.
+            elem.clear()
+            section.remove(elem)
+        elif in_libs and depth <= 3:
+            elem.clear()
+        elif depth == 2 and elem.tag == "Scenes":
+            scenes = elem
+        depth -= 1
+
+    return scenes
+
+def build_data_index():
+    """Index the data blocks <Object data_name=...> can refer to by name.
+
+    Run once import_libraries has created them all, so import_object does
+    one dict lookup per object instead of a get() per data type.  On a name
+    clash armatures win (import_object's armature branch took them first),
+    then meshes, lights and cameras, as the chained get() calls did.
+    """
+    global DATA_INDEX
+    DATA_INDEX = {}
+    for blocks in (bpy.data.cameras, bpy.data.lights, bpy.data.meshes, bpy.data.armatures):
+        DATA_INDEX.update((block.name, block) for block in blocks)
 
-        # Modifiers
-        mods_node = obj_node.find("Modifiers")
-        if mods_node:
-            for m_node in mods_node.findall("Modifier"):
-                mod = obj.modifiers.new(name=m_node.get("name"), type=m_node.get("type"))
-                apply_xml_properties(mod, m_node)
+def import_object(obj_node, collection, parent_obj=None):
+    """Create (or reuse) the object for one <Object> element and return it.
 
-        # NLA
-        if obj_node.find("NLA"):
-            if not obj.animation_data:
-                obj.animation_data_create()
-            for t_node in obj_node.find("NLA").findall("Track"):
-                track = obj.animation_data.nla_tracks.new()
-                apply_xml_properties(track, t_node)
-                for s_node in t_node.findall("Strip"):
-                    act = bpy.data.actions.get(s_node.get("action_name"))
-                    if act:
+    Child <Object> elements are left to import_collections' walk.
+    """
+    name = obj_node.get("name", "Obj")
+    data_block = DATA_INDEX.get(obj_node.get("data_name"))
+
+    # Special case: armature objects already created when importing armature data
+    if isinstance(data_block, bpy.types.Armature):
+        arm_data = data_block
+        if arm_data in HIERARCHY_MAP and 'object' in HIERARCHY_MAP[arm_data]:
+            obj = HIERARCHY_MAP[arm_data]['object']
+            if obj.name not in collection.objects:
+                collection.objects.link(obj)
+
+            print(f"DEBUG: Applying properties to armature object {obj.name} from scene")
+
+            pose_node = obj_node.find("Pose")
+            if obj.type == 'ARMATURE' and pose_node is not None:
+                DEFERRED_POSES.append((obj, parse_pose(pose_node)))
+            active_action = obj_node.get("active_action")
+            if active_action:
+                DEFERRED_ACTIONS.append((obj, active_action))
+
+            apply_xml_properties(obj, obj_node)
+
+            # Texture paint slots
+            tps = obj_node.find("TexturePaintSlots")
+            if tps is not None and obj.type == 'MESH':
+                for slot_el in tps.findall("Slot"):
+                    idx = int(slot_el.get("index", "0"))
+                    mat_name = slot_el.get("material")
+                    mat = bpy.data.materials.get(mat_name)
+                    if mat and idx < len(obj.material_slots):
                         try:
-                            start_f = float(
-                                s_node.find("Properties/Prop[@name='frame_start']").get("value")
-                            )
-                            strip = track.strips.new(s_node.get("name"), int(start_f), act)
-                            apply_xml_properties(strip, s_node)
-                        except:
+                            obj.material_slots[idx].material = mat
+                        except (AttributeError, TypeError):
                             pass
 
-        # Vertex groups
-        if obj_node.find("VertexGroups"):
-            for g_node in obj_node.find("VertexGroups").findall("Group"):
-                vg = obj.vertex_groups.new(name=g_node.get("name"))
-                if obj.type == 'MESH':
-                    for vw in g_node.findall("VW"):
-                        vg.add([int(vw.get("id"))], float(vw.get("w")), 'REPLACE')
-
-        # Texture paint slots
-        tps = obj_node.find("TexturePaintSlots")
-        if tps and obj.type == 'MESH':
-            for slot_el in tps.findall("Slot"):
-                idx = int(slot_el.get("index", "0"))
-                mat_name = slot_el.get("material")
-                mat = bpy.data.materials.get(mat_name)
-                if mat and idx < len(obj.material_slots):
+            return obj
+
+    obj = OBJECT_INDEX.get((name, data_block))
+    if obj is None:
+        obj = bpy.data.objects.new(name, data_block)
+        collection.objects.link(obj)
+        OBJECT_INDEX[(name, data_block)] = obj
+
+    HIERARCHY_MAP[obj] = {
+        'parent': None,
+        'type': None,
+        'bone': None,
+        'inv': None,
+        'transforms': [],
+        'rotation_mode': None,
+    }
+
+    if parent_obj:
+        obj.parent = parent_obj
+
+    if obj.type == 'ARMATURE':
+        obj.show_in_front = True
+        obj.data.display_type = 'STICK'
+
+    apply_xml_properties(obj, obj_node)
+
+    # Modifiers
+    mods_node = obj_node.find("Modifiers")
+    if mods_node is not None:
+        for m_node in mods_node.findall("Modifier"):
+            mod = obj.modifiers.new(name=m_node.get("name"), type=m_node.get("type"))
+            apply_xml_properties(mod, m_node)
+
+    # NLA
+    nla_node = obj_node.find("NLA")
+    if nla_node is not None:
+        if not obj.animation_data:
+            obj.animation_data_create()
+        for t_node in nla_node.findall("Track"):
+            track = obj.animation_data.nla_tracks.new()
+            apply_xml_properties(track, t_node)
+            for s_node in t_node.findall("Strip"):
+                act = bpy.data.actions.get(s_node.get("action_name"))
+                start_f = get_prop_value(s_node, "frame_start")
+                if act and start_f is not None:
                     try:
-                        obj.material_slots[idx].material = mat
-                    except:
-                        pass
+                        strip = track.strips.new(s_node.get("name"), int(float(start_f)), act)
+                    except (ValueError, RuntimeError):
+                        # Malformed frame, or the strip overlaps another
+                        continue
+                    if act.slots:
+                        strip.action_slot = act.slots[0]
+                    apply_xml_properties(strip, s_node)
+
+    # Vertex groups
+    vgroups_node = obj_node.find("VertexGroups")
+    if vgroups_node is not None:
+        for g_node in vgroups_node.findall("Group"):
+            vg = obj.vertex_groups.new(name=g_node.get("name"))
+            if obj.type == 'MESH':
+                ids, weights = parse_vertex_weights(g_node)
+                # One add() per distinct weight instead of one per vertex;
+                # rigs tend to share a handful of values such as 1.0.
+                order = np.argsort(weights, kind='stable')
+                uniq, starts = np.unique(weights[order], return_index=True)
+                for w, group_ids in zip(uniq.tolist(), np.split(ids[order], starts[1:])):
+                    vg.add(group_ids.tolist(), w, 'REPLACE')
+
+    # Texture paint slots
+    tps = obj_node.find("TexturePaintSlots")
+    if tps is not None and obj.type == 'MESH':
+        for slot_el in tps.findall("Slot"):
+            idx = int(slot_el.get("index", "0"))
+            mat_name = slot_el.get("material")
+            mat = bpy.data.materials.get(mat_name)
+            if mat and idx < len(obj.material_slots):
+                try:
+                    obj.material_slots[idx].material = mat
+                except (AttributeError, TypeError):
+                    pass
 
-        import_object(obj_node, collection, parent_obj=obj)
+    return obj
 
 def import_collections(parent_xml, parent_col):
-    for col_node in parent_xml.findall("Collection"):
-        name = col_node.get("name", "Collection")
-
-        if name == parent_col.name:
-            target_col = parent_col
-        else:
-            target_col = bpy.data.collections.get(name)
-            if not target_col:
-                target_col = bpy.data.collections.new(name)
-                parent_col.children.link(target_col)
+    """Create the collections and objects below a <Scene> in a single walk.
+
+    Depth-first with an explicit stack of child iterators, dispatching on
+    each element's tag, so every element is visited once.  The exporter
+    writes a collection's objects before its child collections, so document
+    order is the creation order (and Blender's .001 renaming) as before.
+    <Object> elements directly under <Scene> repeat the collections' objects
+    and are not imported.
+    """
+    stack = [(parent_xml.iterfind("Collection"), parent_col, None)]
+    while stack:
+        children, collection, parent_obj = stack[-1]
+        node = next(children, None)
+        if node is None:
+            stack.pop()
+            continue
+        tag = node.tag
+
+        if tag == "Object":
+            obj = import_object(node, collection, parent_obj)
+            stack.append((iter(node), collection, obj))
+        elif tag == "Collection":
+            name = node.get("name", "Collection")
+            if name == collection.name:
+                target_col = collection
+            else:
+                target_col = bpy.data.collections.get(name)
+                if not target_col:
+                    target_col = bpy.data.collections.new(name)
+                    collection.children.link(target_col)
+            stack.append((iter(node), target_col, None))
+
+def parse_pose(pose_node):
+    """Decode a <Pose> into (bone name, parsed props) pairs for DEFERRED_POSES."""
+    return [(hb.get("name"), parse_xml_properties(hb)) for hb in pose_node.findall("HBone")]
+
+def apply_hbone_props(pbone, parsed):
+    """Apply a pose bone's parsed props straight onto it.
+
+    Pose bones never take part in parenting, so nothing is staged in
+    HIERARCHY_MAP: rotation_mode is set before the transforms so rotation
+    values land in the right mode, and other writable props are set as-is.
+    """
+    if not parsed:
+        return
+    settable = settable_props(pbone)
+    transforms = []
+    for name, type_str, val in parsed:
+        if name == 'rotation_mode':
+            if val:
+                pbone.rotation_mode = val
+        elif name in TRANSFORM_PROPS:
+            transforms.append((name, val))
+        elif val is not None and type_str != 'POINTER' and name in settable:
+            try:
+                setattr(pbone, name, val)
+            except (AttributeError, TypeError, ValueError):
+                pass
 
-        import_object(col_node, target_col, parent_obj=None)
-        import_collections(col_node, target_col)
+    for prop_name, val in transforms:
+        try:
+            setattr(pbone, prop_name, val)
+        except Exception as e:
+            print(f"  Error applying {prop_name} to {pbone.name}: {e}")
 
 def apply_deferred_poses():
     print(f"Applying {len(DEFERRED_POSES)} deferred poses...")
-    for obj, pose_node in DEFERRED_POSES:
+    for obj, pose in DEFERRED_POSES:
         if not obj.pose:
             continue
-        for pb_node in pose_node.findall("HBone"):
-            pbone = obj.pose.bones.get(pb_node.get("name"))
+        pbmap = {pb.name: pb for pb in obj.pose.bones}
+        for bone_name, parsed in pose:
+            pbone = pbmap.get(bone_name)
             if pbone:
-                apply_xml_properties(pbone, pb_node)
-
-                if pbone in HIERARCHY_MAP:
-                    data = HIERARCHY_MAP[pbone]
-                    if data['rotation_mode']:
-                        pbone.rotation_mode = data['rotation_mode']
-
-                    for prop_name, val in data['transforms']:
-                        try:
-                            setattr(pbone, prop_name, val)
-                        except Exception as e:
-                            print(f"  Error applying {prop_name} to {pbone.name}: {e}")
-
-                    del HIERARCHY_MAP[pbone]
+                apply_hbone_props(pbone, parsed)
 
 def apply_deferred_actions():
     print(f"Applying {len(DEFERRED_ACTIONS)} deferred actions...")
@@ -780,16 +1353,19 @@ def apply_deferred_actions():
             if not obj.animation_data:
                 obj.animation_data_create()
             obj.animation_data.action = act
+            if act.slots:
+                obj.animation_data.action_slot = act.slots[0]
             print(f"settiing obj.animation_data.action = {act}")
 
 def resolve_hierarchy():
     print(f"Resolving hierarchy for {len(HIERARCHY_MAP)} objects...")
     valid_objects = [o for o in HIERARCHY_MAP.keys() if isinstance(o, bpy.types.Object)]
+    obj_by_name = {o.name: o for o in bpy.data.objects}
 
     for obj in valid_objects:
         data = HIERARCHY_MAP[obj]
         if data['parent']:
-            parent = bpy.data.objects.get(data['parent'])
+            parent = obj_by_name.get(data['parent'])
             if parent and parent is not obj:
                 obj.parent = parent
                 if data['type']:
@@ -822,19 +1398,26 @@ def apply_model_rotation():
     pass
 
 def resolve_links():
+    if not DEFERRED_LINKS:
+        return
+
+    # One name -> datablock table for all the pointer targets, built once
+    # however many links share a target.  Collections are taken in the old
+    # get() chain's priority order and setdefault keeps the first match, so
+    # an object still wins over a mesh of the same name and so on.
+    targets = {}
+    for collection in (bpy.data.objects, bpy.data.meshes, bpy.data.materials,
+                       bpy.data.actions, bpy.data.armatures, bpy.data.cameras,
+                       bpy.data.lights, bpy.data.images):
+        for block in collection:
+            targets.setdefault(block.name, block)
+
     for obj, prop_name, target_name in DEFERRED_LINKS:
-        target = (bpy.data.objects.get(target_name) or
-                  bpy.data.meshes.get(target_name) or
-                  bpy.data.materials.get(target_name) or
-                  bpy.data.actions.get(target_name) or
-                  bpy.data.armatures.get(target_name) or
-                  bpy.data.cameras.get(target_name) or
-                  bpy.data.lights.get(target_name) or
-                  bpy.data.images.get(target_name))
-        if target:
+        target = targets.get(target_name)
+        if target is not None:
             try:
                 setattr(obj, prop_name, target)
-            except:
+            except (AttributeError, TypeError):
                 pass
 
 def importFromXML(filename):
@@ -845,37 +1428,62 @@ def importFromXML(filename):
         print(f"ERROR: XML file not found at {abs_path}")
         return
 
-    tree = ET.parse(abs_path)
-    root = tree.getroot()
-    clean_scene()
-
-    import_libraries(root, os.path.dirname(abs_path))
-
-    scenes = root.find("Scenes")
-    if scenes:
-        for s_node in scenes.findall("Scene"):
-            scene = bpy.data.scenes.new(s_node.get("name")) if len(bpy.data.scenes) == 0 else bpy.data.scenes[0]
-            scene.name = s_node.get("name")
-            if s_node.get("frame_start"):
-                scene.frame_start = int(s_node.get("frame_start"))
-            if s_node.get("frame_end"):
-                scene.frame_end = int(s_node.get("frame_end"))
-
-            bpy.context.window.scene = scene
-            import_collections(s_node, scene.collection)
-            apply_xml_properties(scene, s_node)
-
-    resolve_hierarchy()
-    resolve_links()
-    apply_model_rotation()
-    bpy.context.view_layer.update()
-    apply_deferred_poses()
-    apply_deferred_actions()
-    bpy.context.scene.frame_set(bpy.context.scene.frame_start)
-    print("Import Complete.")
+    # The import streams the file after clearing the scene, so a malformed
+    # file has to be rejected up front or it would wipe the open scene.
+    try:
+        check_well_formed(abs_path)
+    except ET.ParseError as e:
+        print(f"ERROR: Malformed XML in {abs_path}: {e}")
+        return
 
-try:
-    importFromXML("LILY_7_3_BLEND.blxml")
-except:
-    import traceback
-    traceback.print_exc()
+    # Every datablock created below would otherwise push an undo step.
+    edit_prefs = bpy.context.preferences.edit
+    use_global_undo = edit_prefs.use_global_undo
+    edit_prefs.use_global_undo = False
+    try:
+        clean_scene()
+
+        scenes = import_libraries(abs_path, os.path.dirname(abs_path))
+        build_deferred_armatures()
+        finalize_meshes()
+        build_data_index()
+        if scenes is not None:
+            for s_node in scenes.findall("Scene"):
+                scene_name = s_node.get("name")
+                scene = bpy.data.scenes.new(scene_name) if len(bpy.data.scenes) == 0 else bpy.data.scenes[0]
+                scene.name = scene_name
+                frame_start = s_node.get("frame_start")
+                if frame_start:
+                    scene.frame_start = int(frame_start)
+                frame_end = s_node.get("frame_end")
+                if frame_end:
+                    scene.frame_end = int(frame_end)
+
+                bpy.context.window.scene = scene
+                import_collections(s_node, scene.collection)
+                apply_xml_properties(scene, s_node)
+
+        resolve_hierarchy()
+        resolve_links()
+        apply_model_rotation()
+        # Single depsgraph evaluation for the whole import.
+        bpy.context.view_layer.update()
+        apply_deferred_poses()
+        apply_deferred_actions()
+        bpy.context.scene.frame_set(bpy.context.scene.frame_start)
+        print("Import Complete.")
+    finally:
+        # Also on failure, so the hidden template never stays in the file
+        remove_material_template()
+        edit_prefs.use_global_undo = use_global_undo
+
+def main():
+    try:
+        importFromXML("LILY_7_3_BLEND.blxml")
+    except Exception:
+        # Missing and malformed files are reported by importFromXML itself
+        import traceback
+        traceback.print_exc()
+
+if __name__ == "__main__":
+    main()